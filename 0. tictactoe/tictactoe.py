@@ -2,39 +2,55 @@
 Tic Tac Toe Player
 """
 
-import copy
 import math
+import os
+import pickle
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Bitboards: cell (i, j) is stored in bit 3 * i + j of X's or O's number
+FULL_BOARD = 0b111111111
+WIN_MASKS = (
+    0b111000000, 0b000111000, 0b000000111,  # Rows
+    0b100100100, 0b010010010, 0b001001001,  # Columns
+    0b100010001, 0b001010100                # Diagonals
+)
+
+# Center first, then corners, then edges - strongest moves get searched first
+MOVE_ORDER = (
+    (1, 1),
+    (0, 0), (0, 2), (2, 0), (2, 2),
+    (0, 1), (1, 0), (1, 2), (2, 1)
+)
+MOVE_BITS = tuple((action, 1 << (3 * action[0] + action[1])) for action in MOVE_ORDER)
+
+# Already searched boards: bitboard key -> (value, flag)
+TRANSPOSITION_TABLE = dict()
+EXACT, LOWERBOUND, UPPERBOUND = 0, 1, 2
+
+# Optimal action for every reachable board, saved between runs
+POLICY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "policy.pkl")
+POLICY_VERSION = 1
+
 
 def initial_state():
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return ((EMPTY, EMPTY, EMPTY),
+            (EMPTY, EMPTY, EMPTY),
+            (EMPTY, EMPTY, EMPTY))
 
 
 def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    # Count number of Xs ans Os on a board
-    number_of_O = 0
-    number_of_X = 0
-    for row in range(len(board)):
-        for column in range(len(board)):
-            if board[row][column] == X:
-                number_of_X += 1
-            elif board[row][column] == O:
-                number_of_O += 1
-
-    # If players made equal turns, X has the next turn
-    if number_of_O == number_of_X:
+    # X moves first, so X has the next turn whenever an odd number of cells is empty
+    number_of_empty = sum(row.count(EMPTY) for row in board)
+    if number_of_empty % 2 == 1:
         return X
     return O
 
@@ -43,98 +59,46 @@ def actions(board) -> set:
     """
     Returns set of all possible actions (i, j) available on the board.
     """
+    x_bits, o_bits = to_bitboard(board)
+    empty_cells = FULL_BOARD & ~(x_bits | o_bits)
+
     possible_actions = set()
-    for row in range(len(board)):
-        for column in range(len(board)):
-            if board[row][column] == EMPTY:
-                possible_actions.add((row, column))
+    while empty_cells:
+        # Take the lowest empty cell and clear it
+        lowest_cell = empty_cells & -empty_cells
+        empty_cells ^= lowest_cell
+        possible_actions.add(divmod(lowest_cell.bit_length() - 1, 3))
     return possible_actions
 
 
-def result(board, action) -> list:
+def result(board, action) -> tuple:
     """
     Returns the board that results from making move (i, j) on the board.
     """
     # Check if action is valid
-    if action not in actions(board):
+    row, column = action
+    if not (0 <= row < 3 and 0 <= column < 3) or board[row][column] != EMPTY:
         raise Exception
-    
-    # Make deep copy of board
-    result_board = copy.deepcopy(board)
 
-    # Make a move
-    result_board[action[0]][action[1]] = player(result_board)
-    return result_board
+    # Rebuild only the changed row, other rows are shared with the old board
+    result_board = [tuple(board_row) for board_row in board]
+    changed_row = result_board[row]
+    result_board[row] = changed_row[:column] + (player(board),) + changed_row[column + 1:]
+    return tuple(result_board)
 
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    # Check if its a start of a game
-    if board == initial_state():
-        return None
-
-    first_diagonal = []
-    second_diagonal = []
-
-    for row in range(len(board)):
-        # Get columns and diagonals
-        one_column = []
-        for column in range(len(board)):
-            one_column.append(board[column][row])
-            if column == row:
-                first_diagonal.append(board[row][column])
-            if column + row == 2:
-                second_diagonal.append(board[row][column])
-        
-        # Search for a winner in a row
-        winner_in_a_row = check_dimension(board[row])
-        if winner_in_a_row:
-            return winner_in_a_row
-
-        # Search for a winner in a column
-        winner_in_a_column = check_dimension(one_column)
-        if winner_in_a_column:
-            return winner_in_a_column
-        
-    # Search for winner in diagonals
-    first_diagonal_winner = check_dimension(first_diagonal)
-    second_diagonal_winner = check_dimension(second_diagonal)
-    if first_diagonal_winner:
-        return first_diagonal_winner
-    if second_diagonal_winner:
-        return second_diagonal_winner
-    
-    # Tie case
-    return None
-    
+    return bitboard_winner(*to_bitboard(board))
 
-def check_dimension(dimension):
-    """Check one row / column / diagonal"""
-    if EMPTY in dimension:
-        return None
-    if X in dimension and O in dimension:
-        return None
-    if X in dimension:
-        return X
-    return O
-            
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    # Check if one of players won
-    if winner(board):
-        return True
-    
-    # Check if there is empty space left
-    if not actions(board):
-        return True
-    
-    # Game still in progress
-    return False
+    return bitboard_utility(*to_bitboard(board)) is not None
 
 
 def utility(board):
@@ -149,68 +113,235 @@ def utility(board):
     return 0
 
 
+def to_bitboard(board) -> tuple:
+    """Convert board into (x_bits, o_bits) pair"""
+    x_bits, o_bits = 0, 0
+    for row in range(3):
+        for column in range(3):
+            if board[row][column] == X:
+                x_bits |= 1 << (3 * row + column)
+            elif board[row][column] == O:
+                o_bits |= 1 << (3 * row + column)
+    return (x_bits, o_bits)
+
+
+def bitboard_winner(x_bits, o_bits):
+    """Return the player who has a full row / column / diagonal, if there is one"""
+    for mask in WIN_MASKS:
+        if x_bits & mask == mask:
+            return X
+        if o_bits & mask == mask:
+            return O
+    return None
+
+
+def bitboard_utility(x_bits, o_bits):
+    """Return utility of a finished game or None if game is still in progress"""
+    winner_player = bitboard_winner(x_bits, o_bits)
+    if winner_player == X:
+        return 1
+    if winner_player == O:
+        return -1
+
+    # Tie case
+    if x_bits | o_bits == FULL_BOARD:
+        return 0
+    return None
+
+
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
     if terminal(board):
         return None
-    
+
+    # Every reachable board is already solved
+    x_bits, o_bits = to_bitboard(board)
+    key = x_bits | (o_bits << 9)
+    if key in POLICY:
+        return POLICY[key]
+    return search_action(x_bits, o_bits, player(board))
+
+
+def search_action(x_bits, o_bits, current_player):
+    """Search for the optimal action of current_player on unfinished bitboard"""
     best_possible_action = ()
-    
-    current_player = player(board)
+    alpha, beta = -2, 2
+    filled_cells = x_bits | o_bits
+
     if current_player == X:
         # Count best value for max-player
         max_value = -2
-        for action in actions(board):
-            action_value = get_min_value(result(board, action))
+        for action, move in MOVE_BITS:
+            if filled_cells & move:
+                continue
+            action_value = get_min_value(x_bits | move, o_bits, alpha, beta)
             if action_value == 1:
                 return action
             if action_value > max_value:
                 max_value = action_value
                 best_possible_action = action
+            alpha = max(alpha, max_value)
 
     if current_player == O:
         # Count best value for min-player
         min_value = 2
-        for action in actions(board):
-            action_value = get_max_value(result(board, action))
+        for action, move in MOVE_BITS:
+            if filled_cells & move:
+                continue
+            action_value = get_max_value(x_bits, o_bits | move, alpha, beta)
             if action_value == -1:
                 return action
             if action_value < min_value:
                 min_value = action_value
                 best_possible_action = action
+            beta = min(beta, min_value)
 
     return best_possible_action
 
 
-def get_max_value(board):
+def get_max_value(x_bits, o_bits, alpha, beta):
     """Count the action with maximum value possible"""
 
     # If game is over - count the result
-    if terminal(board):
-        return utility(board)
-    
+    value = bitboard_utility(x_bits, o_bits)
+    if value is not None:
+        return value
+
+    # Reuse result if this board was already reached by another move order
+    key = x_bits | (o_bits << 9)
+    if key in TRANSPOSITION_TABLE:
+        cached_value, flag = TRANSPOSITION_TABLE[key]
+        if flag == EXACT:
+            return cached_value
+        if flag == LOWERBOUND:
+            alpha = max(alpha, cached_value)
+        else:
+            beta = min(beta, cached_value)
+        if alpha >= beta:
+            return cached_value
+
     # Count the highest possible action
     value = -2
-    for action in actions(board):
-        value = max(value, get_min_value(result(board, action)))
-        if value == 1:
-            return value
+    window = (alpha, beta)
+    filled_cells = x_bits | o_bits
+    for _, move in MOVE_BITS:
+        if filled_cells & move:
+            continue
+        value = max(value, get_min_value(x_bits | move, o_bits, alpha, beta))
+        # Min-player already has a better option elsewhere - prune the rest
+        alpha = max(alpha, value)
+        if alpha >= beta:
+            break
+
+    store_value(key, value, *window)
     return value
 
 
-def get_min_value(board):
+def get_min_value(x_bits, o_bits, alpha, beta):
     """Count the action with minimal value possible"""
-    
+
     # If game is over - count the result
-    if terminal(board):
-        return utility(board)
-    
+    value = bitboard_utility(x_bits, o_bits)
+    if value is not None:
+        return value
+
+    # Reuse result if this board was already reached by another move order
+    key = x_bits | (o_bits << 9)
+    if key in TRANSPOSITION_TABLE:
+        cached_value, flag = TRANSPOSITION_TABLE[key]
+        if flag == EXACT:
+            return cached_value
+        if flag == LOWERBOUND:
+            alpha = max(alpha, cached_value)
+        else:
+            beta = min(beta, cached_value)
+        if alpha >= beta:
+            return cached_value
+
     # Count the lowest possible action
     value = 2
-    for action in actions(board):
-        value = min(value, get_max_value(result(board, action)))
-        if value == -1:
-            return value
+    window = (alpha, beta)
+    filled_cells = x_bits | o_bits
+    for _, move in MOVE_BITS:
+        if filled_cells & move:
+            continue
+        value = min(value, get_max_value(x_bits, o_bits | move, alpha, beta))
+        # Max-player already has a better option elsewhere - prune the rest
+        beta = min(beta, value)
+        if alpha >= beta:
+            break
+
+    store_value(key, value, *window)
     return value
+
+
+def store_value(key, value, alpha, beta):
+    """Save value of the board searched within (alpha, beta) window"""
+    # Value outside of the window is only a bound on the real one
+    if value <= alpha:
+        flag = UPPERBOUND
+    elif value >= beta:
+        flag = LOWERBOUND
+    else:
+        flag = EXACT
+    TRANSPOSITION_TABLE[key] = (value, flag)
+
+
+def build_policy() -> dict:
+    """Find the optimal action for every board reachable from the initial state"""
+    policy = dict()
+    boards_to_visit = [(0, 0)]
+    while boards_to_visit:
+        x_bits, o_bits = boards_to_visit.pop()
+        key = x_bits | (o_bits << 9)
+        if key in policy or bitboard_utility(x_bits, o_bits) is not None:
+            continue
+
+        # X moves whenever both players made equal number of moves
+        filled_cells = x_bits | o_bits
+        x_turn = bin(x_bits).count("1") == bin(o_bits).count("1")
+        policy[key] = search_action(x_bits, o_bits, X if x_turn else O)
+
+        # Visit every board one move further
+        for _, move in MOVE_BITS:
+            if filled_cells & move:
+                continue
+            if x_turn:
+                boards_to_visit.append((x_bits | move, o_bits))
+            else:
+                boards_to_visit.append((x_bits, o_bits | move))
+    return policy
+
+
+def load_policy() -> dict:
+    """
+    Load policy saved by previous run or build and save a new one.
+    POLICY_VERSION must be bumped whenever the search or the bitboard key
+    encoding changes, otherwise a stale policy.pkl will be reused.
+    """
+    # Any problem with saved file just means the policy gets rebuilt
+    try:
+        with open(POLICY_FILE, "rb") as file:
+            saved = pickle.load(file)
+        if (
+            isinstance(saved, tuple) and len(saved) == 2 and
+            saved[0] == POLICY_VERSION and isinstance(saved[1], dict)
+        ):
+            return saved[1]
+    except Exception:
+        pass
+
+    policy = build_policy()
+
+    # Not being able to save policy only costs rebuilding it next time
+    try:
+        with open(POLICY_FILE, "wb") as file:
+            pickle.dump((POLICY_VERSION, policy), file)
+    except OSError:
+        pass
+    return policy
+
+
+POLICY = load_policy()
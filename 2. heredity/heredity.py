@@ -1,7 +1,8 @@
 import csv
-import itertools
 import sys
 
+import numpy as np
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -36,6 +37,35 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Probability that parent with given number of genes passes gene to a child
+PASS_PROB = (PROBS["mutation"], 0.5, 1 - PROBS["mutation"])
+
+
+def child_gene_distribution(mother_genes: int, father_genes: int) -> tuple:
+    """
+    Return probabilities that child has 0, 1 and 2 genes
+    given number of genes of their mother and father
+    """
+    mother = PASS_PROB[mother_genes]
+    father = PASS_PROB[father_genes]
+    return (
+        # No gene from either parent
+        (1 - mother) * (1 - father),
+        # Gene from exactly one parent
+        mother * (1 - father) + father * (1 - mother),
+        # Gene from both parents
+        mother * father
+    )
+
+
+# Lookup tables for PROBS, indexed by number of genes:
+# GENE_TABLE[genes], TRAIT_TABLE[genes][trait], CHILD_GENE_TABLE[child][mother][father]
+GENE_TABLE = np.array([PROBS["gene"][genes] for genes in range(3)])
+TRAIT_TABLE = np.array([[PROBS["trait"][genes][False], PROBS["trait"][genes][True]] for genes in range(3)])
+CHILD_GENE_TABLE = np.array([
+    [child_gene_distribution(mother, father) for father in range(3)] for mother in range(3)
+]).transpose(2, 0, 1)  # Move child's number of genes to the first axis
+
 
 def main():
 
@@ -60,26 +90,16 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
+    # Compute probability of every gene assignment once
+    names, mother_index, father_index, traits = people_arrays(people)
+    genes = gene_assignments(names)
+    genes_probabilities = gene_probabilities(genes, mother_index, father_index)
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
-
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    # Traits depend only on the person's own genes, so instead of looping over
+    # all sets of people who might have the trait, sum over traits per person
+    evidence = evidence_probabilities(genes, traits)
+    p = genes_probabilities * evidence.prod(axis=1)
+    update_all(probabilities, names, traits, genes, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
@@ -116,18 +136,6 @@ def load_data(filename):
     return data
 
 
-def powerset(s):
-    """
-    Return a list of all possible subsets of set s.
-    """
-    s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
-
-
 def joint_probability(people: dict, one_gene: set, two_genes: set, have_trait: set) -> float:
     """
     Compute and return a joint probability.
@@ -170,45 +178,95 @@ def joint_probability(people: dict, one_gene: set, two_genes: set, have_trait: s
     return result_probability
 
 
+def people_arrays(people: dict) -> tuple:
+    """
+    Convert `people` into parallel arrays indexed by person's position in `names`.
+    Return a tuple (names, mother_index, father_index, traits), where unknown
+    parents are -1 and traits are 1 (has trait), 0 (doesn't) or -1 (unknown).
+    """
+    names = list(people)
+    index = {name: i for i, name in enumerate(names)}
+    mother_index = np.array([index.get(people[name]["mother"], -1) for name in names], dtype=np.int32)
+    father_index = np.array([index.get(people[name]["father"], -1) for name in names], dtype=np.int32)
+    traits = np.array([
+        -1 if people[name]["trait"] is None else int(people[name]["trait"]) for name in names
+    ], dtype=np.int8)
+    return (names, mother_index, father_index, traits)
+
+
+def gene_assignments(names: list) -> np.ndarray:
+    """
+    Return array of all possible gene assignments for `names`.
+    Each row is one assignment, where column i holds the number of genes of names[i].
+    """
+    # Sets of people are bitmasks: bit i is set if names[i] is in the set
+    everyone = (1 << len(names)) - 1
+    one_gene_masks, two_genes_masks = list(), list()
+    for two_genes in range(everyone + 1):
+
+        # Loop over all subsets of people who don't have two genes
+        rest = everyone & ~two_genes
+        one_gene = rest
+        while True:
+            one_gene_masks.append(one_gene)
+            two_genes_masks.append(two_genes)
+            if not one_gene:
+                break
+            one_gene = (one_gene - 1) & rest
+
+    # Unpack bitmasks into number of genes per person
+    bits = np.arange(len(names))
+    one_gene = (np.array(one_gene_masks)[:, np.newaxis] >> bits) & 1
+    two_genes = (np.array(two_genes_masks)[:, np.newaxis] >> bits) & 1
+    return (one_gene + 2 * two_genes).astype(np.int8)
+
+
+def gene_probabilities(genes: np.ndarray, mother_index: np.ndarray, father_index: np.ndarray) -> np.ndarray:
+    """
+    Compute probability of every gene assignment (row of `genes`) at once,
+    ignoring traits.
+    """
+    result_probabilities = np.ones(len(genes))
+    for i in range(genes.shape[1]):
+        number_of_genes = genes[:, i]
+
+        # Case where we know persons parents
+        if mother_index[i] >= 0 and father_index[i] >= 0:
+            mother_genes = genes[:, mother_index[i]]
+            father_genes = genes[:, father_index[i]]
+            gene_probability = CHILD_GENE_TABLE[number_of_genes, mother_genes, father_genes]
+        # Case we know noting about persons parents
+        else:
+            gene_probability = GENE_TABLE[number_of_genes]
+
+        result_probabilities *= gene_probability
+
+    return result_probabilities
+
+
+def evidence_probabilities(genes: np.ndarray, traits: np.ndarray) -> np.ndarray:
+    """
+    Compute probability of every person's known trait for every gene
+    assignment (row of `genes`) at once. Unknown trait can take both values,
+    so its probability is 1.
+    """
+    result_probabilities = np.ones(genes.shape)
+    known = traits >= 0
+    result_probabilities[:, known] = TRAIT_TABLE[genes[:, known], traits[known]]
+    return result_probabilities
+
+
 def calculate_child_gene_probability(mother_genes: int, father_genes: int, child_number_of_genes: int) -> float:
     """
     Calculate probability that child will have given number
     of genes based on the known data about their parents
     """
-    probability_of_mothers_gene = calculate_probability_of_passing_gene_to_child(mother_genes)
-    probability_of_fathers_gene = calculate_probability_of_passing_gene_to_child(father_genes)
-
-    match child_number_of_genes:
-        case 2:
-            # If child has 2 genes, multiply the probabilities of inheriting gene from each parent
-            gene_probability = probability_of_mothers_gene * probability_of_fathers_gene
-        case 1:
-            # If child has 1 gene, add probabilities of inheriting gene from each parent and not from other
-            gene_probability = (
-                probability_of_mothers_gene * (1 - probability_of_fathers_gene) + 
-                probability_of_fathers_gene * (1 - probability_of_mothers_gene)
-            )
-        case 0:
-            # If child has no genes, multiply probabilities of not inheriting gene from each parent
-            gene_probability = (
-                (1 - probability_of_mothers_gene) * (1 - probability_of_fathers_gene)
-            )
-    return gene_probability
+    return float(CHILD_GENE_TABLE[child_number_of_genes, mother_genes, father_genes])
 
 
 def calculate_probability_of_passing_gene_to_child(number_of_parent_genes: int) -> float:
     """:)"""
-    match number_of_parent_genes:
-        case 2:
-            # 100% - mutation case
-            probability = 1 - PROBS["mutation"]
-        case 1:
-            # 100% - mutation case divided by 2
-            probability = 0.5
-        case 0:
-            # Mutation - only possible way
-            probability = PROBS["mutation"]
-    return probability
+    return PASS_PROB[number_of_parent_genes]
 
 
 def get_number_of_genes_by_name(person: str, one_gene: set, two_genes: set) -> int:
@@ -241,6 +299,30 @@ def update(probabilities: dict, one_gene: set, two_genes: set, have_trait: set,
     return None
 
 
+def update_all(probabilities: dict, names: list, traits: np.ndarray, genes: np.ndarray, p: np.ndarray) -> None:
+    """
+    Add to `probabilities` joint probabilities `p` of every gene assignment
+    (row of `genes`), already summed over all traits allowed by `traits`.
+    """
+    for i, person in enumerate(names):
+        # Update genes values
+        genes_sums = np.bincount(genes[:, i], weights=p, minlength=3)
+        for number_of_genes in range(3):
+            probabilities[person]["gene"][number_of_genes] += float(genes_sums[number_of_genes])
+
+        # Known trait already has its probability in `p`
+        if traits[i] >= 0:
+            probabilities[person]["trait"][bool(traits[i])] += float(p.sum())
+            continue
+
+        # Unknown trait contributed 1 to `p`, so weight `p` by each trait value
+        for trait in (True, False):
+            trait_probability = TRAIT_TABLE[genes[:, i], int(trait)]
+            probabilities[person]["trait"][trait] += float((p * trait_probability).sum())
+
+    return None
+
+
 def normalize(probabilities: dict) -> None:
     """
     Update `probabilities` such that each probability distribution
@@ -1,11 +1,21 @@
+import bisect
+import itertools
 import os
 import random
 import re
 import sys
 
+import numpy as np
+
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Print largest rank change after every iteration of iterate_pagerank
+VERBOSE = False
+
+# Target of every link in HTML page
+HREF_RE = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
 
 def main():
     if len(sys.argv) != 2:
@@ -30,13 +40,14 @@ def crawl(directory):
     pages = dict()
 
     # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".html"):
+                continue
+            with open(entry.path, encoding="utf-8") as f:
+                contents = f.read()
+                links = {match.group(1) for match in HREF_RE.finditer(contents)}
+                pages[entry.name] = links - {entry.name}
 
     # Only include links to other pages in the corpus
     for filename in pages:
@@ -88,27 +99,32 @@ def sample_pagerank(corpus: dict, damping_factor: float, n: int) -> dict:
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    pages_occurrence = dict()
-    next_sample_pages = dict()
-
-    # Take 10.000 samples
-    for sample in range(n):
-        if sample == 0:
-            # Choose page randomly
-            page = random.choice(list(corpus.keys()))
-            next_sample_pages = transition_model(corpus, page, damping_factor)
-            pages_occurrence[page] = 1
-        else:
-            # Choose page based on previous sample transition model
-            page = random.choices(list(next_sample_pages.keys()), weights=next_sample_pages.values(), k=1)[0]
-            next_sample_pages = transition_model(corpus, page, damping_factor)
-            if page in pages_occurrence.keys():
-                pages_occurrence[page] += 1
-            else:
-                pages_occurrence[page] = 1
+    pages = list(corpus.keys())
+    if n == 0:
+        return dict()
+
+    # Transition model of visited pages as cumulative probabilities, computed on first visit
+    cumulative_probabilities = dict()
+
+    # Choose first page randomly
+    page_index = random.randrange(len(pages))
+    pages_occurrence = [0] * len(pages)
+    pages_occurrence[page_index] += 1
+
+    for _ in range(1, n):
+        # Choose page based on previous sample transition model
+        row = cumulative_probabilities.get(page_index)
+        if row is None:
+            next_sample_pages = transition_model(corpus, pages[page_index], damping_factor)
+            row = list(itertools.accumulate(next_sample_pages[page] for page in pages))
+            cumulative_probabilities[page_index] = row
+
+        # Guard against rounding past the last page
+        page_index = min(bisect.bisect_right(row, random.random() * row[-1]), len(pages) - 1)
+        pages_occurrence[page_index] += 1
 
     # Divide each value by n (10.000) in order to get probability instead of number of occurrences
-    pages_page_rank = {page:float(pages_occurrence[page]) / n for page in pages_occurrence}
+    pages_page_rank = {page: pages_occurrence[i] / n for i, page in enumerate(pages)}
     return pages_page_rank
 
 
@@ -125,65 +141,47 @@ def iterate_pagerank(corpus: dict, damping_factor: float) -> dict:
     # Get reversed corpus dict
     reversed_corpus: dict = reverse_corpus(corpus)
 
+    # Give every page an index in rank vector
+    pages = list(corpus.keys())
+    page_index = {page: i for i, page in enumerate(pages)}
+    total_num_of_pages = len(pages)
+
+    # Build link matrix: links[j][i] - probability of following a link from page i to page j
+    links = np.zeros((total_num_of_pages, total_num_of_pages))
+    for page, source_pages in reversed_corpus.items():
+        for source_page in source_pages:
+            num_of_links = len(corpus[source_page]) or total_num_of_pages
+            links[page_index[page], page_index[source_page]] = 1 / num_of_links
+
     # Assign each page equal 1 / n rank
-    total_num_of_pages = len(corpus)
-    starting_rank = 1 / total_num_of_pages
-    pages_page_rank = {page:starting_rank for page in corpus}
+    pages_page_rank = np.full(total_num_of_pages, 1 / total_num_of_pages)
 
     # Calculate first part of Pagerank formula
     random_page_probability = (1 - damping_factor) / total_num_of_pages
 
-    # Infinite loop
+    # Update all ranks at once until none of them changes by more than 0.001
     while True:
-        # Set flag
-        stop_iterating = True
-
-        for page in corpus.keys():
-            # Get all pages linking to current page
-            source_pages: set = reversed_corpus[page]
-
-            # Sum info about pages linking to current page
-            sum_of_source_pages_ranks = 0
-            for source_page in source_pages:
-                source_page_rank = pages_page_rank[source_page] 
-                num_of_links = len(corpus[source_page])
-                sum_of_source_pages_ranks += source_page_rank / num_of_links
-            
-            # Calculate new page rank
-            old_pagerank = pages_page_rank[page]
-            new_pagerank = random_page_probability + damping_factor * sum_of_source_pages_ranks
-            pages_page_rank[page] = new_pagerank
-
-            # Calculate difference between old and new ranks
-            ranks_difference = abs(new_pagerank - old_pagerank)
-            print(ranks_difference)
-            if ranks_difference > 0.001:
-                stop_iterating = False
-
-        # Check if we need to continue iterating        
-        if stop_iterating:
-            return pages_page_rank
-        
+        new_page_rank = random_page_probability + damping_factor * (links @ pages_page_rank)
+        ranks_difference = np.abs(new_page_rank - pages_page_rank).max()
+        pages_page_rank = new_page_rank
+        if VERBOSE:
+            print(f"Largest rank change: {ranks_difference:.6f}")
+        if ranks_difference <= 0.001:
+            return {page: float(pages_page_rank[page_index[page]]) for page in pages}
+
 
 def reverse_corpus(corpus: dict) -> dict:
     """
     Create dict out of corpus where keys will be the titles of the pages
     and values: the pages that link to key-page rather than pages to which key-page links
     """
-    reversed_corpus = dict()
-
-    # Add link to every page if page has no links
-    for page in corpus.keys():
-        if not corpus[page]:
-            corpus[page] = corpus.keys()
-
-    for page in corpus.keys():
-        # Find all pages linking to current page
-        source_pages = set()
-        for source_page, target_pages in corpus.items():
-            if page in target_pages:
-                source_pages.add(source_page)
-        reversed_corpus[page] = source_pages
+    reversed_corpus = {page: set() for page in corpus}
+
+    # Add every page as a source of pages it links to
+    for source_page, target_pages in corpus.items():
+        # Page with no links is treated as linking to every page
+        for page in target_pages or corpus.keys():
+            reversed_corpus[page].add(source_page)
     return reversed_corpus
 
 
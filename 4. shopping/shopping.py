@@ -1,11 +1,26 @@
-import csv
 import sys
 
+import numpy as np
+import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.neighbors import KNeighborsClassifier
 
 TEST_SIZE = 0.4
 
+EVIDENCE_COLUMNS = [
+    "Administrative", "Administrative_Duration", "Informational",
+    "Informational_Duration", "ProductRelated", "ProductRelated_Duration",
+    "BounceRates", "ExitRates", "PageValues", "SpecialDay", "Month",
+    "OperatingSystems", "Browser", "Region", "TrafficType", "VisitorType", "Weekend"
+]
+
+MONTHS = {
+    "January": 0, "Feb": 1, "Mar": 2,
+    "April": 3, "May": 4, "June": 5, "Jul": 6,
+    "Aug": 7, "Sep": 8, "Oct": 9,
+    "Nov": 10, "Dec": 11
+}
+
 
 def main():
 
@@ -33,87 +48,53 @@ def main():
 
 def load_data(filename: str) -> tuple:
     """
-    Load shopping data from a CSV file `filename` and convert into a list of
-    evidence lists and a list of labels. Return a tuple (evidence, labels).
+    Load shopping data from a CSV file `filename` and convert into an array of
+    evidence rows and an array of labels. Return a tuple (evidence, labels).
 
-    evidence should be a list of lists, where each list contains the
-    following values, in order:
-        - Administrative, an integer
+    evidence should be a 2D float array, where each row contains the
+    following values, in order (whole numbers are stored as floats):
+        - Administrative, a whole number
         - Administrative_Duration, a floating point number
-        - Informational, an integer
+        - Informational, a whole number
         - Informational_Duration, a floating point number
-        - ProductRelated, an integer
+        - ProductRelated, a whole number
         - ProductRelated_Duration, a floating point number
         - BounceRates, a floating point number
         - ExitRates, a floating point number
         - PageValues, a floating point number
         - SpecialDay, a floating point number
         - Month, an index from 0 (January) to 11 (December)
-        - OperatingSystems, an integer
-        - Browser, an integer
-        - Region, an integer
-        - TrafficType, an integer
-        - VisitorType, an integer 0 (not returning) or 1 (returning)
-        - Weekend, an integer 0 (if false) or 1 (if true)
-
-    labels should be the corresponding list of labels, where each label
+        - OperatingSystems, a whole number
+        - Browser, a whole number
+        - Region, a whole number
+        - TrafficType, a whole number
+        - VisitorType, a whole number 0 (not returning) or 1 (returning)
+        - Weekend, a whole number 0 (if false) or 1 (if true)
+
+    labels should be the corresponding array of labels, where each label
     is 1 if Revenue is true, and 0 otherwise.
     """
-    evidences, labels = list(), list()
-
-    with open(filename) as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            evidence = list()
-            for column_name, data in row.items():
-                if column_name in (
-                    "Administrative", "Informational", "ProductRelated",
-                    "OperatingSystems", "Browser", "Region", "TrafficType"
-                ):
-                    evidence.append(int(data))
-                elif column_name in (
-                    "Administrative_Duration", "Informational_Duration", 
-                    "ProductRelated_Duration", "BounceRates", "ExitRates",
-                    "PageValues", "SpecialDay"
-                ):
-                    evidence.append(float(data))
-                elif column_name == "VisitorType":
-                    visitor_type = 0
-                    if data == "Returning_Visitor":
-                        visitor_type = 1
-                    evidence.append(visitor_type)
-                elif column_name == "Weekend":
-                    weekend = 0
-                    if data == "TRUE":
-                        weekend = 1
-                    evidence.append(weekend)
-                elif column_name == "Month":
-                    evidence.append(convert_month_to_int(data))
-                elif column_name == "Revenue":
-                    label = 0
-                    if data == "TRUE":
-                        label = 1
-                    labels.append(label)
-            evidences.append(evidence)
-    return (evidences, labels)
-
-
-def convert_month_to_int(month: str) -> int:
-    months = {
-        "January": 0, "Feb": 1, "Mar": 2,
-        "April": 3, "May": 4, "June": 5, "Jul": 6,
-        "Aug": 7, "Sep": 8, "Oct": 9,
-        "Nov": 10, "Dec": 11
-    }
-    return months[month]
-    
+    data = pd.read_csv(filename, true_values=["TRUE"], false_values=["FALSE"])
+
+    # Encode non-numeric columns as integers
+    months = data["Month"].map(MONTHS)
+    if months.isna().any():
+        raise KeyError(f"Unknown month: {data['Month'][months.isna()].iloc[0]}")
+    data["Month"] = months
+    data["VisitorType"] = (data["VisitorType"] == "Returning_Visitor").astype(int)
+    data["Weekend"] = data["Weekend"].astype(int)
 
-def train_model(evidence: list, labels: list) -> KNeighborsClassifier:
+    labels = data.pop("Revenue").astype(int).to_numpy()
+    evidence = data[EVIDENCE_COLUMNS].to_numpy()
+    return (evidence, labels)
+
+
+def train_model(evidence: np.ndarray, labels: np.ndarray) -> KNeighborsClassifier:
     """
-    Given a list of evidence lists and a list of labels, return a
+    Given a 2D array of evidence and an array of labels, return a
     fitted k-nearest neighbor model (k=1) trained on the data.
     """
-    model = KNeighborsClassifier(n_neighbors=1)
+    model = KNeighborsClassifier(n_neighbors=1, algorithm="kd_tree", n_jobs=-1)
     model.fit(evidence, labels)
     return model
     
@@ -133,23 +114,17 @@ def evaluate(labels: list, predictions: list) -> tuple:
     representing the "true negative rate": the proportion of
     actual negative labels that were accurately identified.
     """
-    # Calculate overall number of positive and negative labels
-    positive_cases = len([case for case in labels if case == 1])
-    negative_cases = len(labels) - positive_cases
-    positive_predictions, negative_predictions = 0, 0
-
-    # Check how well predictions match true labels
-    for label, prediction in zip(labels, predictions):
-        if label == 1:
-            if prediction == label:
-                positive_predictions += 1
-        else:
-            if prediction == label:
-                negative_predictions += 1
-
-    # Calculate final rates
-    sensitivity = float(positive_predictions / positive_cases)
-    specificity = float(negative_predictions / negative_cases)
+    labels = np.asarray(labels)
+    predictions = np.asarray(predictions)
+
+    # Both rates are undefined if one of the classes is missing
+    positive_cases = labels == 1
+    if positive_cases.all() or not positive_cases.any():
+        raise ValueError("labels must contain both positive and negative cases")
+
+    # Check how well predictions match true labels for each class
+    sensitivity = float((predictions[positive_cases] == 1).mean())
+    specificity = float((predictions[~positive_cases] == 0).mean())
     return (sensitivity, specificity)
 
 
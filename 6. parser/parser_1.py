@@ -65,14 +65,7 @@ def preprocess(sentence: str) -> list:
     and removing any word that does not contain at least one alphabetic
     character.
     """
-    words = word_tokenize(sentence)
-    result = list()
-    for word in words:
-        for char in word:
-            if char.isalpha():
-                result.append(word.lower())
-                break
-    return result
+    return [word.lower() for word in word_tokenize(sentence) if any(map(str.isalpha, word))]
 
 
 def np_chunk(tree: nltk.tree) -> list:
@@ -83,19 +76,24 @@ def np_chunk(tree: nltk.tree) -> list:
     noun phrases as subtrees.
     """
     result = list()
-    parented_tree = nltk.tree.ParentedTree.convert(tree)
-    subtrees = parented_tree.subtrees()
-    for subtree in subtrees:
-        if subtree.label() == "N":
-            possible_np_chunk = subtree.parent()
-            flag = True
-            for other_subtree in possible_np_chunk.subtrees():
-                if other_subtree.label() == "NP":
-                    flag = False
-            if flag:
-                result.append(possible_np_chunk)
+    find_np_chunks(tree, result)
     return result
 
 
+def find_np_chunks(tree: nltk.Tree, chunks: list) -> bool:
+    """
+    Add all noun phrase chunks of `tree` to `chunks` in a single bottom-up pass.
+    Return True if `tree` is or contains a noun phrase.
+    """
+    contains_np = False
+    for child in tree:
+        if isinstance(child, nltk.Tree) and find_np_chunks(child, chunks):
+            contains_np = True
+
+    if tree.label() == "NP" and not contains_np:
+        chunks.append(tree)
+    return contains_np or tree.label() == "NP"
+
+
 if __name__ == "__main__":
     main()